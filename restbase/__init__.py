@@ -1,3 +1,7 @@
-from .base import BaseResource, BaseConnector, BaseClient, operation
+from .base import BaseResource, BaseConnector, AsyncBaseConnector, \
+    BaseClient, operation
 
-__all__ = ["BaseResource", "BaseConnector", "BaseClient", "operation"]
+__all__ = [
+    "BaseResource", "BaseConnector", "AsyncBaseConnector", "BaseClient",
+    "operation"
+]
@@ -1,10 +1,19 @@
 """All base classes are defined in this file."""
 import logging
-import os
-from contextlib import contextmanager
+import threading
+from collections import OrderedDict
 
-from unittest.mock import Mock
-from requests import Session
+from requests import Request, Session
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+#: The HTTP methods supported by `BaseConnector.make_request`.
+_VALID_METHODS = frozenset(("GET", "POST"))
+
+#: The request keyword arguments which can be applied to a request
+#: prepared from a template, see `BaseConnector._prepare_request`.
+_TEMPLATE_KWARGS = frozenset(("timeout", "stream", "data"))
 
 
 class RESTBaseException(Exception):
@@ -25,6 +34,10 @@ class RESTBaseException(Exception):
 class ResponseClass:
     """The response class returning response data from API calls."""
 
+    # The `__dict__` is only allocated if `post_process_request` sets
+    # attributes of its own on the instance.
+    __slots__ = ("response", "code", "data", "__dict__")
+
     def __init__(self, response, code, data):
         """Init the class.
 
@@ -38,15 +51,25 @@ class ResponseClass:
 
     def __repr__(self):
         return (
-            "<ResponseClass: code={0}, response={1}, data={2}>".format(
-                self.code, self.response, self.data))
+            f"<ResponseClass: code={self.code}, response={self.response}, "
+            f"data={self.data}>")
 
 
-class BaseConnector:
-    """The base class used to create API clients."""
+class _ConnectorBase:
+    """The functionality shared by the sync and async connectors."""
+
+    #: The maximum number of headers to keep in the headers cache, see
+    #: `get_headers_cache_key`.
+    HEADERS_CACHE_SIZE = 128
+
+    # The headers created by `create_headers`, keyed by the connector
+    # class and the key returned by `get_headers_cache_key`. The least
+    # recently used headers are evicted when the cache is full.
+    _headers_cache = OrderedDict()
+    _headers_cache_lock = threading.Lock()
 
     def __init__(self, test, timeout):
-        """Initialize the checkout client used to talk to the checkout API.
+        """Initialize the connector.
 
         :param test: Same as `BaseClient`.
         :param timeout: Same as `BaseClient`.
@@ -55,9 +78,11 @@ class BaseConnector:
         self.timeout = timeout
         self.logger = self.get_logger()
 
-        # It is important to call this last, since the headers may
-        # depend on instance attributes.
-        self.headers = self.create_headers()
+        # It is important to call this after setting the other attributes,
+        # since the headers may depend on instance attributes. The headers
+        # are shared by all sessions and must not be modified after init.
+        # Copy them in `pre_process_request` if they must vary per request.
+        self.headers = self._get_headers()
 
     def create_headers(self):
         """Return headers to use in each request.
@@ -65,13 +90,47 @@ class BaseConnector:
         Must be overwritten."""
         raise NotImplementedError
 
+    def get_headers_cache_key(self):
+        """Return a key identifying the headers returned by `create_headers`.
+
+        Connectors with the same class and key will get a copy of the
+        same headers instead of calling `create_headers` again. May be
+        overwritten, e.g. to return the API token. Defaults to `None`,
+        which disables the caching.
+        """
+        return None
+
+    def _get_headers(self):
+        """Return the headers to use, reusing cached headers if possible."""
+        key = self.get_headers_cache_key()
+        if key is None:
+            return CaseInsensitiveDict(self.create_headers())
+
+        key = (type(self), key)
+        cache = self._headers_cache
+        with self._headers_cache_lock:
+            headers = cache.get(key)
+            if headers is not None:
+                cache.move_to_end(key)
+                return headers.copy()
+
+        headers = CaseInsensitiveDict(self.create_headers())
+        with self._headers_cache_lock:
+            cache[key] = headers
+            while len(cache) > self.HEADERS_CACHE_SIZE:
+                cache.popitem(last=False)
+        # Each connector gets its own copy, so they may be modified
+        # without affecting other connectors.
+        return headers.copy()
+
     def encode_data(self, method, data):
         """Encode the request data.
 
         Must be overwritten.
 
         :param method: The HTTP method for the request.
-        :param data: The data to encode, if any.
+        :param data: The data to encode. This is never `None`, since
+            requests without data are sent without a body.
         """
         raise NotImplementedError
 
@@ -80,7 +139,8 @@ class BaseConnector:
 
         This would be the place to decode JSON. Must be overwritten.
 
-        :param rawdata: The raw data to decode.
+        :param rawdata: The raw response body as `bytes`. It is passed
+            undecoded, since JSON parsers accept bytes directly.
         :return: The response data.
         """
         raise NotImplementedError
@@ -89,77 +149,44 @@ class BaseConnector:
         """Return the logger instance to be used for logging."""
         return logging.getLogger(__name__)
 
-    def make_request(self, url, method, reqdata=None):
-        """Make a request to a passed URL.
+    def _prepare_reqkwargs(self, url, method, reqdata, reqkwargs):
+        """Validate the method and build the keyword arguments to send.
 
         :param url: The URL to send the request to.
-        :param method: The method to use. Should be GET or POST.
+        :param method: The method to use.
         :param reqdata: The parameters passed by the client.
-                       Should only be used when doing a POST request
-        :raise ValueError: If an incorrect `method` is passed.
-        :raise TimeoutError: If a request timeout occurred.
-        :raise RequestError: If an unhandled request error occurred.
-        :return: Return a `ResponseClass` instance.
+        :param reqkwargs: The default keyword arguments for the request.
+        :return: A tuple of the upper-case method and the keyword arguments.
         """
 
-        # We want the method to be in upper-case for comparison reasons.
-        method = method.upper()
-
-        # Set default values for the request args and kwargs.
-        reqkwargs = {"timeout": self.timeout}
+        # We want the method to be in upper-case for comparison reasons,
+        # but only pay for the conversion when it isn't already.
+        if method not in _VALID_METHODS:
+            method = method.upper()
+            if method not in _VALID_METHODS:
+                raise ValueError(
+                    f"Unsupported method={method}, must be one of "
+                    "GET or POST")
 
         # Pre process the data
         reqdata = self.pre_process_request_data(method, reqdata)
 
-        # Encode the data
-        reqkwargs["data"] = self.encode_data(method, reqdata)
+        # Encode the data. Without any data (e.g. most GET requests) no
+        # body should be sent at all, so skip the encoding.
+        if reqdata is None:
+            reqkwargs["data"] = None
+        else:
+            reqkwargs["data"] = self.encode_data(method, reqdata)
 
         # Pre process the request data.
         reqkwargs = self.pre_process_request(method, url, reqkwargs)
 
-        # Send the actual request
-        self.logger.info(
-            "Sending request with method=%s to url=%s", method, url)
-        resp = self.send_request(method, url, reqkwargs)
-
-        # Try to decode the response
-        data = self.decode_data(resp.text)
-
-        # Post process the request.
-        respcls = ResponseClass(resp, resp.status_code, data)
-        respcls = self.post_process_request(respcls)
-        return respcls
-
-    def send_request(self, method, url, reqkwargs):
-        """Send a request to the server.
-
-        A common use-case is to raise a custom exception when the
-        underlying `requests` library raises something. This could
-        be accomplished by overriding this method and wrapping a try-except
-        around a call to `super().send_request`. Then simply catch the
-        underlying exception and raise your own.
-
-        :param method: The HTTP method to use.
-        :param url: The URL to send the request to.
-        :param reqkwargs: The keyword arguments to pass to the
-            request function.
-        """
-
-        # We need to create a new session on every request to
-        # ensure thread-safety.
-        session = self.create_session()
-        # Send the actual request
-        resp = session.request(method=method, url=url, **reqkwargs)
-        self.logger.info(
-            "Sent request to url=%s and method=%s, "
-            "received status_code=%d", url, method, resp.status_code)
-        return resp
-
-    def create_session(self):
-        """Return a session object to use for sending the request."""
-        session = Session()
-        session.headers = self.headers
-        return session
+        # The level is checked up front to avoid the logging call
+        # overhead when INFO is disabled.
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Sending request with method=%s to url=%s", method, url)
+        return method, reqkwargs
 
     def pre_process_request_data(self, method, reqdata):
         """
@@ -184,6 +211,7 @@ class BaseConnector:
         :param reqkwargs: The keyword arguments to send to the
             underlying `requests` call. `data` will be present, but
             it's value and type depends on the return value of `encode_data`.
+            It is `None` if there is no request data.
         :return: The keyword arguments to pass to the underlying
             `requests` call.
         """
@@ -201,7 +229,259 @@ class BaseConnector:
         return respcls
 
     def __repr__(self):
-        return "<{0}: test={1}>".format(type(self).__name__, self.test)
+        return f"<{type(self).__name__}: test={self.test}>"
+
+
+class BaseConnector(_ConnectorBase):
+    """The base class used to create API clients."""
+
+    #: The number of connection pools to cache in the session's adapters.
+    POOL_CONNECTIONS = 10
+
+    #: The maximum number of connections to keep alive in each pool.
+    POOL_MAXSIZE = 10
+
+    #: Whether the sessions read settings, such as proxies, certificates
+    #: and netrc credentials, from the environment. When disabled,
+    #: requests are sent from prepared templates, which is faster.
+    TRUST_ENV = True
+
+    #: The retry policy used by the session's adapters. Failed connections
+    #: are retried for all methods, but only idempotent requests are
+    #: retried when a gateway error is returned. When the retries are
+    #: exhausted, the last response is returned as usual.
+    #:
+    #: Note that the timeout applies to each attempt, so with the default
+    #: policy a single call may take up to 4 times the timeout, plus
+    #: about 1.8 seconds of backoff, or longer if the server sends a
+    #: `Retry-After` header. Use `Retry(0)` to disable the retries.
+    RETRY_POLICY = Retry(
+        total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(("GET",)), raise_on_status=False)
+
+    def __init__(self, test, timeout):
+        """Initialize the checkout client used to talk to the checkout API.
+
+        :param test: Same as `BaseClient`.
+        :param timeout: Same as `BaseClient`.
+        """
+        super().__init__(test=test, timeout=timeout)
+
+        # Sessions are not guaranteed to be thread-safe, so each thread
+        # gets its own session, which is then reused for every request
+        # made from that thread to benefit from connection pooling.
+        self._local = threading.local()
+
+    def make_request(self, url, method, reqdata=None):
+        """Make a request to a passed URL.
+
+        :param url: The URL to send the request to.
+        :param method: The method to use. Should be GET or POST.
+        :param reqdata: The parameters passed by the client.
+                       Should only be used when doing a POST request
+        :raise ValueError: If an incorrect `method` is passed.
+        :raise TimeoutError: If a request timeout occurred.
+        :raise RequestError: If an unhandled request error occurred.
+        :return: Return a `ResponseClass` instance.
+        """
+        resp, code, data = self._make_request_tuple(url, method, reqdata)
+
+        # Post process the request.
+        respcls = ResponseClass(resp, code, data)
+        respcls = self.post_process_request(respcls)
+        return respcls
+
+    def _make_request_tuple(self, url, method, reqdata=None):
+        """Make a request without post processing it.
+
+        Takes the same arguments as `make_request`.
+
+        :return: A tuple of the response, status code and decoded data.
+        """
+        # Set default values for the request args and kwargs.
+        method, reqkwargs = self._prepare_reqkwargs(
+            url, method, reqdata, {"timeout": self.timeout})
+        resp = self.send_request(method, url, reqkwargs)
+
+        # Try to decode the response
+        data = self.decode_data(resp.content)
+        return resp, resp.status_code, data
+
+    def send_request(self, method, url, reqkwargs):
+        """Send a request to the server.
+
+        A common use-case is to raise a custom exception when the
+        underlying `requests` library raises something. This could
+        be accomplished by overriding this method and wrapping a try-except
+        around a call to `super().send_request`. Then simply catch the
+        underlying exception and raise your own. The response body has
+        been read when this returns, so errors while reading it are
+        raised from here as well.
+
+        :param method: The HTTP method to use.
+        :param url: The URL to send the request to.
+        :param reqkwargs: The keyword arguments to pass to the
+            request function.
+        """
+
+        # Send the actual request. Plain requests are sent from a template
+        # to skip the request preparation done by `Session.request`. This
+        # is only possible when nothing depends on the environment, such
+        # as netrc credentials or proxy and certificate settings.
+        session = self._session
+        if (not session.trust_env and
+                reqkwargs.keys() <= _TEMPLATE_KWARGS and
+                session.auth is None and not session.params and
+                not session.cookies):
+            prep = self._prepare_request(method, url, reqkwargs.get("data"))
+            resp = session.send(
+                prep, timeout=reqkwargs.get("timeout"),
+                stream=reqkwargs.get("stream", False))
+        else:
+            resp = session.request(method=method, url=url, **reqkwargs)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Sent request to url=%s and method=%s, "
+                "received status_code=%d", url, method, resp.status_code)
+        return resp
+
+    @property
+    def _session(self):
+        """Return the session for the current thread, creating it if needed."""
+        try:
+            return self._local.session
+        except AttributeError:
+            session = self._local.session = self.create_session()
+            return session
+
+    def _prepare_request(self, method, url, data):
+        """Return a prepared request based on this thread's templates.
+
+        The templates have the session headers merged in already, so
+        only the URL and the body must be prepared for each request.
+        Must only be used with sessions which don't trust the environment.
+
+        :param method: The HTTP method to use.
+        :param url: The URL to send the request to.
+        :param data: The encoded request data, or `None`.
+        """
+        try:
+            templates = self._local.templates
+        except AttributeError:
+            session = self._session
+            templates = self._local.templates = {
+                method: session.prepare_request(
+                    Request(method, "http://localhost/"))
+                for method in _VALID_METHODS
+            }
+
+        prep = templates[method].copy()
+        prep.prepare_url(url, None)
+        if data is not None:
+            prep.prepare_body(data, None)
+        # Credentials in the URL are turned into an Authorization header.
+        prep.prepare_auth(None)
+        return prep
+
+    def create_session(self):
+        """Return a session object to use for sending requests.
+
+        This is called once per thread, and the returned session is
+        reused for all subsequent requests made from that thread.
+        """
+        session = Session()
+        session.headers = self.headers
+        session.trust_env = self.TRUST_ENV
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE, max_retries=self.RETRY_POLICY)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+class AsyncBaseConnector(_ConnectorBase):
+    """The base class used to create asynchronous API clients.
+
+    Works like `BaseConnector`, but `make_request` and `send_request` are
+    coroutines and the requests are sent with `aiohttp`, which must be
+    installed. The keyword arguments passed to `pre_process_request` are
+    those of `aiohttp.ClientSession.request`, and the response objects
+    are `aiohttp.ClientResponse` instances with the body already read.
+
+    Call `close` when the connector is no longer needed.
+    """
+
+    #: The maximum number of simultaneous connections.
+    CONNECTION_LIMIT = 20
+
+    #: The maximum number of simultaneous connections to the same host.
+    CONNECTION_LIMIT_PER_HOST = 10
+
+    def __init__(self, test, timeout):
+        """Initialize the connector.
+
+        :param test: Same as `BaseClient`.
+        :param timeout: Same as `BaseClient`.
+        """
+        super().__init__(test=test, timeout=timeout)
+        # The session must be created from within the event loop,
+        # so it is created on the first request.
+        self._client_session = None
+
+    async def make_request(self, url, method, reqdata=None):
+        """Make a request to a passed URL.
+
+        See `BaseConnector.make_request`.
+        """
+        method, reqkwargs = self._prepare_reqkwargs(url, method, reqdata, {})
+        resp = await self.send_request(method, url, reqkwargs)
+
+        # Try to decode the response
+        data = self.decode_data(await resp.read())
+
+        # Post process the request.
+        respcls = ResponseClass(resp, resp.status, data)
+        respcls = self.post_process_request(respcls)
+        return respcls
+
+    async def send_request(self, method, url, reqkwargs):
+        """Send a request to the server.
+
+        See `BaseConnector.send_request`.
+        """
+        if self._client_session is None or self._client_session.closed:
+            self._client_session = self.create_client_session()
+
+        # Send the actual request, and read the body to release the
+        # connection back to the pool.
+        resp = await self._client_session.request(method, url, **reqkwargs)
+        await resp.read()
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "Sent request to url=%s and method=%s, "
+                "received status_code=%d", url, method, resp.status)
+        return resp
+
+    def create_client_session(self):
+        """Return an `aiohttp.ClientSession` to use for sending requests.
+
+        The session is reused for all requests until `close` is called.
+        """
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.CONNECTION_LIMIT,
+            limit_per_host=self.CONNECTION_LIMIT_PER_HOST)
+        return aiohttp.ClientSession(
+            connector=connector, headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        """Close the underlying session and its connections."""
+        if self._client_session is not None:
+            await self._client_session.close()
+            self._client_session = None
 
 
 class BaseResource:
@@ -221,6 +501,13 @@ class BaseResource:
         self.client = connector(
             *connector_args, test=test, **connector_kwargs)
 
+        # The base URL never changes, so it is resolved once, on first use.
+        self._url = None
+
+        # Remember which kind of API calls the connector supports, so
+        # using the wrong one fails with a clear error.
+        self._async = isinstance(self.client, AsyncBaseConnector)
+
     @property
     def _test_url(self):
         """Return the test URL. Must be overwritten."""
@@ -236,10 +523,11 @@ class BaseResource:
     @property
     def url(self):
         """Return the test or production URL, based on the current context."""
-        if self.test:
-            url = self._test_url
-        else:
-            url = self._production_url
+        url = self._url
+        if url is None:
+            url = self._test_url if self.test else self._production_url
+            # Paths are joined with a slash, so avoid ending up with two.
+            url = self._url = url.rstrip("/")
         return url
 
     def _build_url(self, *args):
@@ -249,7 +537,18 @@ class BaseResource:
             For example: "path" and "to" creates the path "/path/to".
         :return: A complete URL as a string.
         """
-        return os.path.join(self.url, *args)
+        return "/".join((self.url,) + args)
+
+    def _build_url_fmt(self, template, **kwargs):
+        """Return a URL based on the `url` and a path template.
+
+        :param template: A path template to format with `kwargs`.
+            For example: "path/{id}/to" with `id=1` creates the
+            path "/path/1/to".
+        :param kwargs: The values to format the template with.
+        :return: A complete URL as a string.
+        """
+        return self.url + "/" + template.format_map(kwargs)
 
     def _api_call(self, url, method, data=None):
         """Make an API call.
@@ -260,15 +559,48 @@ class BaseResource:
         :param url: The URL to send the request to.
         :param method: The method on the client to use.
         :param data: The data to pass to the client method.
+        :raise TypeError: If the connector is an `AsyncBaseConnector`.
         :return: A `ResponseClass` instance.
         """
 
         # Make the actual API call.
-        respcls = self.client.make_request(url, method, data)
+        if self._async:
+            raise TypeError(
+                f"{type(self.client).__name__} is asynchronous, "
+                "use _api_call_async instead")
+        # If the connector doesn't customize how the response is built,
+        # we can skip creating the intermediate `ResponseClass`. The
+        # bound methods are checked, so patched instances are respected.
+        client = self.client
+        if (getattr(client.make_request, "__func__", None) is
+                BaseConnector.make_request and
+                getattr(client.post_process_request, "__func__", None) is
+                _ConnectorBase.post_process_request):
+            response, code, data = client._make_request_tuple(
+                url, method, data)
+        else:
+            respcls = self.client.make_request(url, method, data)
+            response, code, data = (
+                respcls.response, respcls.code, respcls.data)
 
         # The last thing we do is to check for errors. If an error
         # was found, raise an exception. If no error was found, a
         # dictionary of the response data will be returned.
+        return self._check_for_errors(
+            code=code, data=data, response=response)
+
+    async def _api_call_async(self, url, method, data=None):
+        """Make an API call using an `AsyncBaseConnector`.
+
+        See `_api_call`.
+
+        :raise TypeError: If the connector isn't an `AsyncBaseConnector`.
+        """
+        if not self._async:
+            raise TypeError(
+                f"{type(self.client).__name__} is not asynchronous, "
+                "use _api_call instead")
+        respcls = await self.client.make_request(url, method, data)
         return self._check_for_errors(
             code=respcls.code, data=respcls.data, response=respcls.response)
 
@@ -287,7 +619,7 @@ class BaseResource:
         raise NotImplementedError
 
     def __repr__(self):
-        return "<{0}>".format(type(self).__name__)
+        return f"<{type(self).__name__}>"
 
 
 class BaseClient:
@@ -305,7 +637,8 @@ class BaseClient:
     #: The default connector to use. Must be overwritten.
     DEFAULT_CONNECTOR = BaseConnector
 
-    #: The default timeout for the library.
+    #: The default timeout for the library. It applies to each attempt
+    #: made by the connector, see `BaseConnector.RETRY_POLICY`.
     DEFAULT_TIMEOUT = 15
 
     def __init__(
@@ -316,7 +649,8 @@ class BaseClient:
             or production environment.
         :param version: A dictionary indicating which versions of
             the API to use for different versions.
-        :param timeout: Optional. The request timeout, defaults to 15.
+        :param timeout: Optional. The timeout of each request attempt,
+            defaults to 15.
         :param connector: Optional. The connector to use for contacting the
             API. Defaults to `self.DEFAULT_CONNECTOR`.
         """
@@ -329,12 +663,15 @@ class BaseClient:
 
     def _create_resources(self):
         """Create the resources"""
+        # The arguments are the same for all resources. They are unpacked
+        # into each resource, so the dict itself is never shared.
+        arguments = self._get_resource_arguments()
         # Create the resources.
         for namespace, version in self.version.items():
             # Get the resource class.
             resource_cls = self._get_resource_cls(namespace, version)
             # Initialize the resource class.
-            resource = resource_cls(**self._get_resource_arguments())
+            resource = resource_cls(**arguments)
             # Set the resource class on the mapper.
             setattr(self, namespace, resource)
 
@@ -360,38 +697,73 @@ class BaseClient:
         }
 
 
-def _mock_manager(func):
-    """Wrapper that returns a contextmanager for mocking API calls."""
-    # The mock which gets set when in mocking mode.
-    func._mock = None
+class _MockContext:
+    """Context manager setting the mock of an operation while active."""
 
-    @contextmanager
-    def manager(*args, **kwargs):
+    __slots__ = ("_func", "_current", "_mock")
+
+    def __init__(self, func, current, mock):
+        self._func = func
+        self._current = current
+        self._mock = mock
+
+    def __enter__(self):
         # Setup context: Set the mock when the this context is invoked.
-        func._mock = Mock(*args, **kwargs)
+        self._current[0] = self._func._mock = self._mock
 
         # Return the mock for the context
-        yield func._mock
+        return self._mock
 
+    def __exit__(self, *exc_info):
         # Teardown context: Remove the mock
-        func._mock = None
+        self._current[0] = self._func._mock = None
+
+
+def _mock_manager(func, current):
+    """Wrapper that returns a contextmanager for mocking API calls.
+
+    :param func: The operation to mock.
+    :param current: A one-element list holding the active mock, shared
+        with the operation's wrapper.
+    """
+    # The mock which gets set when in mocking mode. It is mirrored on
+    # the function to make it easy to inspect.
+    func._mock = None
+
+    def manager(*args, **kwargs):
+        # Mocking is only used in tests, so avoid importing the mock
+        # library when the package is imported.
+        import inspect
+        from unittest.mock import AsyncMock, Mock
+
+        # Asynchronous operations must return something awaitable.
+        if inspect.iscoroutinefunction(func):
+            mock = AsyncMock(*args, **kwargs)
+        else:
+            mock = Mock(*args, **kwargs)
+        return _MockContext(func, current, mock)
 
     return manager
 
 
 def operation(func):
     """Decorator that should be used to mark all API operations."""
+    # The active mock is kept in a closure cell rather than read from
+    # the function on every call, since operations are rarely mocked.
+    current = [None]
+
     def inner(self, *args, **kwargs):
-        # Call the mock if we are in mock mode.
-        if func._mock:
-            # We do not include self in the call, since that will
-            # make the mock's assert helpers act crazy.
-            return func._mock(*args, **kwargs)
+        mock = current[0]
         # If we are not mocking, call the actual underlying function.
-        return func(self, *args, **kwargs)
+        if mock is None:
+            return func(self, *args, **kwargs)
+        # Call the mock if we are in mock mode. We do not include self
+        # in the call, since that will make the mock's assert helpers
+        # act crazy.
+        return mock(*args, **kwargs)
 
     # Create a mock manager.
-    inner.mock = _mock_manager(func)
+    inner.mock = _mock_manager(func, current)
 
     # We set this shortcut to the function to simplify testing.
     inner._func = func
@@ -14,5 +14,6 @@ setup(
     download_url="https://github.com/sweetpay/restbase/"
                  "tarball/%s" % __version__,
     packages=["restbase"],
-    install_requires=["requests>=2.0"]
+    install_requires=["requests>=2.0", "urllib3>=1.26"],
+    extras_require={"async": ["aiohttp>=3.0"]}
 )
@@ -1,8 +1,27 @@
 import pytest
 
-from tests.utils import SomeClient
+from tests.utils import SomeClient, SomeResource, Server
 
 
 @pytest.fixture()
 def client():
     return SomeClient("api-token", test=True, version={"resource": 1})
+
+
+@pytest.fixture()
+def server():
+    server = Server()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def live_client(server):
+    """Return a client talking to the local `server`."""
+    resource_cls = type(
+        "LiveResource", (SomeResource,), {"_test_url": server.url})
+    client_cls = type(
+        "LiveClient", (SomeClient,),
+        {"RESOURCE_MAPPER": {("resource", 1): resource_cls}})
+    return client_cls("api-token", test=True, version={"resource": 1})
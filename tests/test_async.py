@@ -0,0 +1,102 @@
+"""Test the asynchronous connector against a local server."""
+import asyncio
+import json
+
+import pytest
+
+from tests.utils import SomeAsyncConnector, SomeAsyncResource, \
+    SomeClient, SomeConnector, SomeResource
+
+pytest.importorskip("aiohttp")
+
+
+@pytest.fixture()
+def async_client(server):
+    resource_cls = type(
+        "LiveAsyncResource", (SomeAsyncResource,), {"_test_url": server.url})
+    client_cls = type(
+        "LiveAsyncClient", (SomeClient,),
+        {"RESOURCE_MAPPER": {("resource", 1): resource_cls},
+         "DEFAULT_CONNECTOR": SomeAsyncConnector})
+    return client_cls("api-token", test=True, version={"resource": 1})
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncConnector:
+
+    def test_concurrent_requests(self, async_client, server):
+        resource = async_client.resource
+
+        async def main():
+            try:
+                return await asyncio.gather(
+                    *(resource.other_operation(i) for i in range(10)))
+            finally:
+                await resource.client.close()
+
+        responses = run(main())
+        assert [data["path"] for data in responses] == [
+            f"/other/{i}/path" for i in range(10)]
+        assert server.requests[0]["headers"]["Authorization"] == "api-token"
+
+    def test_post(self, async_client, server):
+        resource = async_client.resource
+
+        async def main():
+            try:
+                return await resource.create(a=1)
+            finally:
+                await resource.client.close()
+
+        data = run(main())
+        assert data["method"] == "POST"
+        assert json.loads(data["body"]) == {"a": 1}
+
+    def test_error_status(self, async_client, server):
+        resource = async_client.resource
+
+        async def main():
+            try:
+                return await resource.client.make_request(
+                    server.url + "/status/500", "GET")
+            finally:
+                await resource.client.close()
+
+        assert run(main()).code == 500
+
+    def test_no_sync_machinery(self):
+        assert not hasattr(SomeAsyncConnector, "create_session")
+        assert not hasattr(SomeAsyncConnector, "_session")
+
+    def test_sync_api_call_with_async_connector(self, async_client):
+        with pytest.raises(TypeError) as excinfo:
+            async_client.resource._api_call(
+                async_client.resource.url, "GET")
+        assert "_api_call_async" in str(excinfo.value)
+
+    def test_async_api_call_with_sync_connector(self):
+        resource = SomeResource(
+            test=True, connector=SomeConnector, api_token="token", timeout=1)
+        with pytest.raises(TypeError) as excinfo:
+            run(resource._api_call_async(resource.url, "GET"))
+        assert "_api_call" in str(excinfo.value)
+
+
+class TestAsyncMocking:
+
+    def test_mock_is_awaitable(self, async_client):
+        resource = async_client.resource
+        with resource.create.mock(return_value={"status": "OK"}) as mock:
+            data = run(resource.create(a=1))
+
+        assert data == {"status": "OK"}
+        mock.assert_awaited_once_with(a=1)
+
+    def test_mock_with_exception(self, async_client):
+        resource = async_client.resource
+        with resource.create.mock(side_effect=KeyError("error")):
+            with pytest.raises(KeyError):
+                run(resource.create())
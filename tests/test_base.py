@@ -0,0 +1,374 @@
+"""Test the base classes against a local server."""
+import json
+import threading
+from unittest import mock
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from restbase.base import BaseResource, ResponseClass
+from tests.utils import SomeClient, SomeConnector, SomeException, \
+    SomeResource
+
+
+class TestConnector:
+
+    def test_session_reused_between_requests(self, live_client, server):
+        resource = live_client.resource
+        session = resource.client._session
+        resource.other_operation(1)
+        resource.create(a=1)
+        resource.other_operation(2)
+
+        assert resource.client._session is session
+        # All requests were sent over the same, kept alive, connection.
+        assert len({req["client"] for req in server.requests}) == 1
+
+    def test_session_per_thread(self, live_client):
+        connector = live_client.resource.client
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(connector._session))
+        thread.start()
+        thread.join()
+        assert sessions[0] is not connector._session
+
+    def test_headers_sent(self, live_client, server):
+        live_client.resource.other_operation(1)
+        assert server.requests[0]["headers"]["Authorization"] == "api-token"
+
+    def test_no_body_without_data(self, live_client, server):
+        live_client.resource.other_operation(1)
+        request = server.requests[0]
+        assert request["body"] is None
+        assert "Content-Length" not in request["headers"]
+
+    def test_body_encoded(self, live_client, server):
+        data = live_client.resource.create(a=1)
+        assert data["method"] == "POST"
+        assert json.loads(data["body"]) == {"a": 1}
+
+    def test_encode_data_not_called_without_data(self, live_client):
+        connector = live_client.resource.client
+        calls = []
+        connector.encode_data = lambda *args: calls.append(args)
+        connector.make_request(live_client.resource.url, "GET")
+        assert calls == []
+
+    def test_large_body(self, live_client):
+        connector = live_client.resource.client
+        respcls = connector.make_request(
+            live_client.resource.url + "/big/100000", "GET")
+        assert respcls.data["items"] == list(range(100000))
+
+    def test_response_content_available(self, live_client):
+        connector = live_client.resource.client
+        respcls = connector.make_request(
+            live_client.resource.url + "/big/100000", "GET")
+        assert respcls.response.json() == respcls.data
+
+    def test_body_errors_raised_from_send_request(self, live_client):
+        connector = live_client.resource.client
+        send_request = connector.send_request
+
+        def wrapped_send_request(*args):
+            try:
+                return send_request(*args)
+            except requests.RequestException as e:
+                raise SomeException("Request failed", exc=e) from e
+
+        connector.send_request = wrapped_send_request
+        with pytest.raises(SomeException) as excinfo:
+            connector.make_request(
+                live_client.resource.url + "/truncated", "GET")
+        assert isinstance(
+            excinfo.value.exc, requests.exceptions.ChunkedEncodingError)
+
+    def test_post_process_request_can_set_attributes(self, live_client):
+        connector = live_client.resource.client
+
+        def post_process_request(respcls):
+            respcls.extra = "extra"
+            return respcls
+
+        connector.post_process_request = post_process_request
+        respcls = connector.make_request(live_client.resource.url, "GET")
+        assert respcls.extra == "extra"
+
+    def test_patched_make_request_used(self, live_client, server):
+        resource = live_client.resource
+        respcls = ResponseClass(None, 200, {"patched": True})
+        with mock.patch.object(
+                resource.client, "make_request",
+                return_value=respcls) as make_request:
+            data = resource.other_operation(1)
+        assert data == {"patched": True}
+        make_request.assert_called_once_with(
+            resource.url + "/other/1/path", "GET", None)
+        assert server.requests == []
+
+    def test_patched_post_process_request_used(self, live_client):
+        resource = live_client.resource
+
+        def post_process_request(respcls):
+            respcls.data = {"processed": True}
+            return respcls
+
+        with mock.patch.object(
+                resource.client, "post_process_request",
+                side_effect=post_process_request):
+            data = resource.other_operation(1)
+        assert data == {"processed": True}
+
+    def test_class_patched_after_resource_created(self, live_client):
+        resource = live_client.resource
+
+        def post_process_request(self, respcls):
+            respcls.data = {"processed": True}
+            return respcls
+
+        with mock.patch.object(
+                type(resource.client), "post_process_request",
+                post_process_request):
+            data = resource.other_operation(1)
+        assert data == {"processed": True}
+
+    def test_lower_case_method(self, live_client, server):
+        connector = live_client.resource.client
+        respcls = connector.make_request(live_client.resource.url, "post", {})
+        assert respcls.code == 200
+        assert server.requests[0]["method"] == "POST"
+
+    def test_invalid_method(self, live_client, server):
+        connector = live_client.resource.client
+        with pytest.raises(ValueError) as excinfo:
+            connector.make_request(live_client.resource.url, "delete")
+        assert "DELETE" in str(excinfo.value)
+        assert server.requests == []
+
+
+class TestRetries:
+
+    @pytest.fixture()
+    def connector(self, live_client):
+        return live_client.resource.client
+
+    def test_get_retried_on_503(self, connector, server):
+        respcls = connector.make_request(server.url + "/flaky/2", "GET")
+        assert respcls.code == 200
+        assert len(server.requests) == 3
+
+    def test_post_not_retried_on_503(self, connector, server):
+        respcls = connector.make_request(
+            server.url + "/status/503", "POST", {"a": 1})
+        assert respcls.code == 503
+        assert len(server.requests) == 1
+
+    def test_last_response_returned_when_exhausted(self, connector, server):
+        connector.RETRY_POLICY = connector.RETRY_POLICY.new(backoff_factor=0)
+        respcls = connector.make_request(server.url + "/status/503", "GET")
+        assert respcls.code == 503
+        assert len(server.requests) == 4
+
+    def test_retries_disabled(self, connector, server):
+        connector.RETRY_POLICY = Retry(0)
+        respcls = connector.make_request(server.url + "/flaky/1", "GET")
+        assert respcls.code == 503
+        assert len(server.requests) == 1
+
+
+class TestRequestTemplates:
+    """Requests sent from templates must match `Session.request`."""
+
+    @pytest.fixture()
+    def netrc(self, tmpdir, monkeypatch):
+        def write(host):
+            path = tmpdir.join("netrc")
+            path.write(f"machine {host} login user password secret\n")
+            monkeypatch.setenv("NETRC", str(path))
+        return write
+
+    @pytest.fixture()
+    def connector(self, live_client):
+        connector = live_client.resource.client
+        connector.templates_used = 0
+        prepare_request = connector._prepare_request
+
+        def counting_prepare_request(*args):
+            connector.templates_used += 1
+            return prepare_request(*args)
+
+        connector._prepare_request = counting_prepare_request
+        return connector
+
+    def send_both(self, connector, server, url, method, data=None):
+        """Send a request with the connector and with `Session.request`.
+
+        :return: The two requests as received by the server.
+        """
+        connector.make_request(url, method, data)
+        encoded = None if data is None else connector.encode_data(
+            method, data)
+        connector._session.request(method, url, data=encoded, timeout=1)
+        first, second = server.requests[-2:]
+        del first["client"], second["client"]
+        return first, second
+
+    @pytest.mark.parametrize("method, data, userinfo", [
+        ("GET", None, ""), ("POST", {"a": "ö"}, ""), ("POST", {}, ""),
+        ("GET", None, "user:pw@"), ("POST", {"a": 1}, "user:pw@")])
+    def test_matches_session_request(
+            self, connector, server, method, data, userinfo):
+        connector.TRUST_ENV = False
+        url = server.url.replace("://", "://" + userinfo) + "/some path"
+        first, second = self.send_both(connector, server, url, method, data)
+        assert connector.templates_used == 1
+        assert first == second
+        if userinfo:
+            assert first["headers"]["Authorization"].startswith("Basic ")
+
+    def test_not_used_when_trusting_env(self, connector, server):
+        connector.make_request(server.url, "GET")
+        assert connector.templates_used == 0
+
+    def test_netrc_for_api_host(self, connector, server, netrc):
+        netrc("127.0.0.1")
+        first, second = self.send_both(connector, server, server.url, "GET")
+        assert first == second
+        assert first["headers"]["Authorization"].startswith("Basic ")
+
+    def test_netrc_for_other_host(self, connector, server, netrc):
+        netrc("localhost")
+        first, second = self.send_both(connector, server, server.url, "GET")
+        assert first == second
+        assert first["headers"]["Authorization"] == "api-token"
+
+    def test_netrc_ignored_without_trust_env(self, connector, server, netrc):
+        connector.TRUST_ENV = False
+        netrc("127.0.0.1")
+        first, second = self.send_both(connector, server, server.url, "GET")
+        assert connector.templates_used == 1
+        assert first == second
+        assert first["headers"]["Authorization"] == "api-token"
+
+
+class TestHeadersCache:
+
+    @pytest.fixture()
+    def connector_cls(self):
+        class CountingConnector(SomeConnector):
+            calls = []
+
+            def create_headers(self):
+                self.calls.append(self.api_token)
+                return super().create_headers()
+
+        return CountingConnector
+
+    def test_headers_reused_for_same_key(self, connector_cls):
+        first = connector_cls("token", test=True, timeout=1)
+        second = connector_cls("token", test=True, timeout=1)
+        assert connector_cls.calls == ["token"]
+        assert first.headers == second.headers
+        assert first.headers["authorization"] == "token"
+
+    def test_headers_not_shared(self, connector_cls):
+        first = connector_cls("token", test=True, timeout=1)
+        second = connector_cls("token", test=True, timeout=1)
+        first.headers["X-Extra"] = "extra"
+        assert "X-Extra" not in second.headers
+        assert type(first.headers) is CaseInsensitiveDict
+
+    def test_headers_not_cached_without_key(self, connector_cls):
+        connector_cls.get_headers_cache_key = lambda self: None
+        connector_cls("token", test=True, timeout=1)
+        connector_cls("token", test=True, timeout=1)
+        assert connector_cls.calls == ["token", "token"]
+        assert type(connector_cls(
+            "token", test=True, timeout=1).headers) is CaseInsensitiveDict
+
+    def test_cache_bounded(self, connector_cls):
+        connector_cls.HEADERS_CACHE_SIZE = 2
+        for token in ("first", "second", "third", "first"):
+            connector_cls(token, test=True, timeout=1)
+        assert connector_cls.calls == ["first", "second", "third", "first"]
+        assert len(connector_cls._headers_cache) <= 2
+
+
+class TestResource:
+
+    def test_build_url(self, client):
+        assert client.resource._build_url("some", "path") == \
+            "https://test.example.com/some/path"
+
+    def test_build_url_without_path(self, client):
+        assert client.resource._build_url() == "https://test.example.com"
+
+    def test_build_url_with_trailing_slash(self):
+        resource = SlashResource(
+            test=False, connector=SomeConnector, api_token="token",
+            timeout=1)
+        assert resource._build_url("some") == "https://example.com/some"
+
+    def test_build_url_fmt(self, client):
+        assert client.resource._build_url_fmt("other/{id}/path", id=12) == \
+            "https://test.example.com/other/12/path"
+
+    def test_build_url_fmt_with_trailing_slash(self):
+        resource = SlashResource(
+            test=False, connector=SomeConnector, api_token="token",
+            timeout=1)
+        assert resource._build_url_fmt("{a}/{b}", a="x", b=1) == \
+            "https://example.com/x/1"
+
+    def test_operation_url(self, live_client, server):
+        live_client.resource.other_operation(42)
+        assert server.requests[0]["path"] == "/other/42/path"
+
+    def test_production_url(self):
+        resource = SomeResource(
+            test=False, connector=SomeConnector, api_token="token",
+            timeout=1)
+        assert resource.url == "https://example.com"
+
+    def test_url_resolved_lazily(self):
+        resource = NoUrlResource(
+            test=True, connector=SomeConnector, api_token="token", timeout=1)
+        with pytest.raises(NotImplementedError):
+            resource.url
+
+
+class TestClient:
+
+    def test_resource_created(self, client):
+        assert isinstance(client.resource, SomeResource)
+
+    def test_unknown_resource(self):
+        with pytest.raises(ValueError):
+            SomeClient("token", test=True, version={"resource": 2})
+
+    def test_resource_added_after_definition(self):
+        class LateClient(SomeClient):
+            RESOURCE_MAPPER = {}
+
+        LateClient.RESOURCE_MAPPER[("late", 1)] = SomeResource
+        client = LateClient("token", test=True, version={"late": 1})
+        assert isinstance(client.late, SomeResource)
+
+
+    def test_resource_replaced_after_definition(self):
+        class ReplacedClient(SomeClient):
+            RESOURCE_MAPPER = {("resource", 1): SomeResource}
+
+        ReplacedClient.RESOURCE_MAPPER[("resource", 1)] = SlashResource
+        client = ReplacedClient("token", test=True, version={"resource": 1})
+        assert type(client.resource) is SlashResource
+
+class SlashResource(SomeResource):
+    _production_url = "https://example.com/"
+
+
+class NoUrlResource(BaseResource):
+    pass
@@ -53,3 +53,15 @@ class TestMocking:
 
         # Verify: It was the correct exception raised
         assert excinfo.value is expected_exc
+
+    def test_mock_removed_after_exception(self, client):
+        with pytest.raises(KeyError):
+            with client.resource.create.mock():
+                raise KeyError("Something went horribly wrong")
+        assert not client.resource.create._func._mock
+
+    def test_mock_contexts_are_independent(self, client):
+        first = client.resource.create.mock(return_value=1)
+        client.resource.create.mock(return_value=2)
+        with first:
+            assert client.resource.create() == 1
@@ -1,32 +1,58 @@
 import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-from restbase.base import ApiBaseException, BaseConnector, BaseResource, \
-    BaseClient, operation
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
+from restbase.base import RESTBaseException, BaseConnector, \
+    AsyncBaseConnector, BaseResource, BaseClient, operation
 
-class SomeException(ApiBaseException):
+
+class SomeException(RESTBaseException):
     pass
 
 
 class SomeConnector(BaseConnector):
 
+    def __init__(self, api_token, test, timeout):
+        self.api_token = api_token
+        super().__init__(test=test, timeout=timeout)
+
     def create_headers(self):
         return {
             "Authorization": self.api_token, "User-Agent": "Python SDK",
             "Content-Type": "application/json", "Accept": "application/json"
         }
 
+    def get_headers_cache_key(self):
+        return self.api_token
+
     def encode_data(self, method, data):
-        return json.dumps(data)
+        return _json.dumps(data)
 
     def decode_data(self, rawdata):
-        return json.loads(rawdata)
+        """Decode the response body, which is passed as `bytes`."""
+        return _json.loads(rawdata)
+
+
+class SomeAsyncConnector(AsyncBaseConnector):
+
+    def __init__(self, api_token, test, timeout):
+        self.api_token = api_token
+        super().__init__(test=test, timeout=timeout)
+
+    create_headers = SomeConnector.create_headers
+    encode_data = SomeConnector.encode_data
+    decode_data = SomeConnector.decode_data
 
 
 class SomeResource(BaseResource):
 
-    production_url = "https://example.com"
-    test_url = "https://test.example.com"
+    _production_url = "https://example.com"
+    _test_url = "https://test.example.com"
 
     def _check_for_errors(self, code, data, response):
         if code != 200:
@@ -42,13 +68,113 @@ class SomeResource(BaseResource):
 
     @operation
     def other_operation(self, id):
-        url = self._build_url("other", str(id), "path")
+        url = self._build_url_fmt("other/{id}/path", id=id)
         return self._api_call(url, "GET")
 
 
+class SomeAsyncResource(SomeResource):
+
+    @operation
+    async def create(self, **data):
+        url = self._build_url("some", "path")
+        return await self._api_call_async(url, "POST", data)
+
+    @operation
+    async def other_operation(self, id):
+        url = self._build_url_fmt("other/{id}/path", id=id)
+        return await self._api_call_async(url, "GET")
+
+
 class SomeClient(BaseClient):
     RESOURCE_MAPPER = {
         ("resource", 1): SomeResource
     }
 
     DEFAULT_CONNECTOR = SomeConnector
+
+    def __init__(self, api_token, *args, **kwargs):
+        self.api_token = api_token
+        super().__init__(*args, **kwargs)
+
+    def _get_resource_arguments(self):
+        arguments = super()._get_resource_arguments()
+        arguments["api_token"] = self.api_token
+        return arguments
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    """Handler answering with a JSON description of each request.
+
+    Some paths change the response:
+
+    - `/big/<n>`: Include `n` items in the response.
+    - `/status/<code>`: Respond with the given status code.
+    - `/flaky/<n>`: Respond with 503 the first `n` times.
+    - `/truncated`: Close the connection before the body is complete.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else None
+        request = {
+            "method": self.command, "path": self.path,
+            "headers": dict(self.headers), "client": self.client_address,
+            "body": body.decode() if body is not None else None
+        }
+        self.server.requests.append(request)
+
+        parts = self.path.strip("/").split("/")
+        status, items = 200, []
+        if parts[0] == "status":
+            status = int(parts[1])
+        elif parts[0] == "big":
+            items = list(range(int(parts[1])))
+        elif parts[0] == "flaky":
+            if len(self.server.requests) <= int(parts[1]):
+                status = 503
+        elif parts[0] == "truncated":
+            return self._send(200, b'{"truncated": true}', length=1000)
+        request["items"] = items
+        self._send(status, json.dumps(request).encode())
+
+    def _send(self, status, payload, length=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(length or len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        if length:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class Server:
+    """A local HTTP server recording the requests sent to it."""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), _RecordingHandler)
+        self._server.requests = []
+        self.url = "http://127.0.0.1:{0}".format(self._server.server_port)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()